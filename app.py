@@ -7,12 +7,22 @@ import threading
 from datetime import datetime
 import pytz
 from filelock import FileLock
-import pandas as pd
 import random
-import json
+import atexit
+import csv
+import io
 
 # Import sync functions from sync.py
-from sync import sync_to_sheet, sync_from_sheet
+from sync import sync_to_sheet, sync_from_sheet, log
+from timeline import VoteTimeline, BUCKET_SIZES, parse_time
+from vote_index import VoteIndex
+from responses import json_response
+from vote_store import (
+    HISTORY_DIR, append_vote, read_votes, last_seq, range_totals,
+    migrate_legacy_history, recover_segments
+)
+from snapshot import write_snapshot, load_snapshot
+from employee_table import EmployeeTable
 
 # ======================
 # Init
@@ -24,74 +34,394 @@ CORS(app)
 
 DATA_FILE = "data.xlsx"
 LOCK_FILE = "locks/data.lock"
-VOTE_HISTORY_FILE = "vote_history.json"
-VOTE_LOCK_FILE = "locks/vote_history.lock"
+SNAPSHOT_FILE = "snapshots/state.bin"
+SNAPSHOT_VERSION = 4
+SNAPSHOT_INTERVAL = int(os.getenv("SNAPSHOT_INTERVAL", "60"))  # seconds
+FLUSH_INTERVAL = float(os.getenv("FLUSH_INTERVAL", "1"))  # seconds
 VN_TZ = pytz.timezone("Asia/Ho_Chi_Minh")
 SHEET_ID = os.getenv("SHEET_ID")
 
+MAX_PAGE_LIMIT = 500
+MAX_BULK_ROWS = 5000
+
+# In-memory vote timeline and index, restored at startup by load_state()
+timeline = VoteTimeline()
+vote_index = VoteIndex()
+
+# In-memory copy of data.xlsx, reloaded only when the file changes on disk
+table = EmployeeTable(DATA_FILE)
+
+# One shared instance so the lock is re-entrant within a thread
+data_lock = FileLock(LOCK_FILE)
+# Held while a vote is appended and indexed so snapshots see a consistent state
+state_lock = threading.Lock()
+# Position of the last snapshot written or loaded, to skip unchanged snapshots
+snapshot_state = {"marker": None}
+
 # ======================
 # Excel Helpers
 # ======================
-def read_excel():
-    with FileLock(LOCK_FILE):
-        df = pd.read_excel(DATA_FILE, engine='openpyxl')
-        df = df.fillna("")
-        return df.to_dict('records')
+def load_table():
+    """
+    (Re)load data.xlsx and re-apply the votes it does not include yet.
+    Caller holds data_lock.
+    """
+    if table.dirty:
+        log(f"⚠️ {DATA_FILE} changed on disk, dropping {len(table.dirty)} unsaved cell changes")
+    seq = table.load()
+    if seq is None:
+        # Written by another tool (sync from sheet, recal_votes.py): take it as
+        # current and record that, so later votes can be replayed after a crash
+        table.applied_seq = last_seq()
+        table.flush(force=True)
+        return
+    table.applied_seq = seq
+    table.apply_votes(read_votes(seq))
+
+def ensure_table():
+    """
+    Make sure the table reflects data.xlsx and every vote in the history,
+    including votes committed by other app processes. Caller holds data_lock.
+    """
+    if table.is_stale():
+        load_table()
+    else:
+        table.apply_votes(read_votes(table.applied_seq))
 
-def write_excel(rows):
-    with FileLock(LOCK_FILE):
-        df = pd.DataFrame(rows)
-        df.to_excel(DATA_FILE, index=False, engine='openpyxl')
+def read_excel():
+    with data_lock:
+        ensure_table()
+        return [dict(r) for r in table.rows]
 
 def find_employee(employee_id):
-    rows = read_excel()
-    for r in rows:
-        if str(r["employeeId"]) == str(employee_id):
-            return r, rows
-    return None, rows
+    with data_lock:
+        ensure_table()
+        emp = table.find(employee_id)
+        return dict(emp) if emp else None
+
+def read_genders():
+    """Map candidate ID -> gender from the employee table"""
+    try:
+        return {str(r["employeeId"]): r.get("gender") for r in read_excel()}
+    except FileNotFoundError:
+        return {}
+
+def flush_loop():
+    """
+    Background thread saving pending cell changes every FLUSH_INTERVAL
+    seconds. The workbook is written without data_lock, so votes are not
+    blocked while a large data.xlsx is saved.
+    """
+    while True:
+        time.sleep(FLUSH_INTERVAL)
+        try:
+            with data_lock:
+                if table.rows is None or table.is_stale():
+                    continue
+                pending = table.begin_flush()
+            if pending is None:
+                continue
+            table.write_flush(pending)
+            with data_lock:
+                table.finish_flush(pending)
+        except Exception as e:
+            log(f"❌ Flush of {DATA_FILE} failed: {e}")
 
 # ======================
 # Vote History Helpers
 # ======================
-def read_vote_history():
-    """Read vote history from JSON file"""
-    with FileLock(VOTE_LOCK_FILE):
-        if not os.path.exists(VOTE_HISTORY_FILE):
-            return {}
-        
-        try:
-            with open(VOTE_HISTORY_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except json.JSONDecodeError:
-            return {}
-
-def write_vote_history(history):
-    """Write vote history to JSON file"""
-    with FileLock(VOTE_LOCK_FILE):
-        with open(VOTE_HISTORY_FILE, 'w', encoding='utf-8') as f:
-            json.dump(history, f, ensure_ascii=False, indent=2)
-def log_vote(voter_id, candidate_id, vote_count):
-    """Log a vote to the history file"""
-    history = read_vote_history()
-    
+def log_vote(voter_id, candidate_id, vote_count, candidate_gender=None):
+    """Log a vote to the vote history segments. Returns the vote's seq."""
     # Get current time in Vietnam timezone
     current_time = datetime.now(VN_TZ).isoformat()
-    
-    # Initialize voter's history if not exists
-    if voter_id not in history:
-        history[voter_id] = []
-    
-    # Add vote record
-    vote_record = {
-        "candidateId": candidate_id,
-        "time": current_time,
-        "votecount": vote_count
-    }
-    
-    history[voter_id].append(vote_record)
-    
-    # Save to file
-    write_vote_history(history)
+
+    with state_lock:
+        seq = append_vote({
+            "voterId": voter_id,
+            "candidateId": candidate_id,
+            "time": current_time,
+            "votecount": vote_count
+        })
+        vote_index.add(voter_id, candidate_id, current_time, vote_count, seq)
+        timeline.add(candidate_id, candidate_gender, current_time, vote_count)
+        return seq
+
+def catch_up_index():
+    """
+    Index votes committed by other app processes since this process last
+    looked, so the vote indexes stay a contiguous prefix of the history.
+    Called before voting and before serving from the indexes; reads only the
+    tail of the open segment.
+    """
+    with state_lock:
+        for record in read_votes(vote_index.last_seq):
+            candidate = table.find(record["candidateId"])
+            vote_index.add(record["voterId"], record["candidateId"], record["time"],
+                           record.get("votecount", 0), record["seq"])
+            timeline.add(record["candidateId"], candidate.get("gender") if candidate else None,
+                         record["time"], record.get("votecount", 0))
+
+def commit_vote(voter_id, candidate_id, vote_count):
+    """
+    Check and apply a vote in one data_lock hold: the daily vote check, the
+    history append and the dailyvote / votecount update cannot interleave with
+    another vote, in this or another app process. The check reads dailyvote
+    after replaying every vote already in the history, not only the ones
+    this process made. Only the two changed cells are marked for the next
+    flush; the vote itself is already durable in the vote history.
+    Returns (dailyvote remaining, None) or (None, error message).
+    """
+    with data_lock:
+        ensure_table()
+        catch_up_index()
+        voter = table.find(voter_id)
+        candidate = table.find(candidate_id)
+
+        if voter is None or candidate is None:
+            return None, "Invalid employee"
+        if int(voter["dailyvote"]) < vote_count:
+            return None, "Not enough daily votes"
+
+        seq = log_vote(str(voter_id), str(candidate_id), vote_count, candidate.get("gender"))
+        table.apply_vote(voter_id, candidate_id, vote_count, seq)
+        return int(voter["dailyvote"]), None
+
+# ======================
+# Admin Helpers
+# ======================
+def parse_admin_change(change):
+    """
+    Normalize one admin change {"employeeId", "newName", "voteIncrease"}.
+    Empty fields are ignored. Returns (change, None) or (None, error message).
+    """
+    if not isinstance(change, dict):
+        return None, "Invalid row"
+
+    employee_id = str(change.get("employeeId") or "").strip()
+    new_name = str(change.get("newName") or "").strip()
+    vote_increase = change.get("voteIncrease")
+
+    if not employee_id:
+        return None, "Employee ID required"
+
+    if vote_increase in (None, ""):
+        vote_increase = None
+    else:
+        try:
+            vote_increase = int(vote_increase)
+        except (ValueError, TypeError):
+            return None, "Invalid vote increase value"
+        if vote_increase <= 0:
+            return None, "Vote increase must be positive"
+
+    if not new_name and vote_increase is None:
+        return None, "Nothing to update (newName or voteIncrease required)"
+
+    return {"employeeId": employee_id, "newName": new_name, "voteIncrease": vote_increase}, None
+
+def apply_admin_changes(changes):
+    """
+    Apply parsed admin changes (see parse_admin_change) in one data_lock hold
+    with a single save of data.xlsx. All employee IDs are checked against the
+    index first; if any is unknown nothing is applied.
+    Returns (per-change results, applied). Each result has a "status" of
+    "applied", "invalid" or "notApplied" (valid, but the batch was rejected).
+    """
+    with data_lock:
+        ensure_table()
+
+        errors = ["Employee not found" if table.find(c["employeeId"]) is None else None for c in changes]
+        if any(errors):
+            return rejected_results([c["employeeId"] for c in changes], errors), False
+
+        results = []
+        for change in changes:
+            employee_id = change["employeeId"]
+            row = table.find(employee_id)
+            result = {"employeeId": employee_id, "success": True, "status": "applied"}
+
+            if change["newName"]:
+                result["oldName"] = row.get("englishname", "")
+                result["newName"] = change["newName"]
+                table.set(employee_id, "englishname", change["newName"])
+
+            if change["voteIncrease"] is not None:
+                old_vote_count = int(row.get("dailyvote") or 0)
+                result["olddailyvoteCount"] = old_vote_count
+                result["newdailyvoteCount"] = old_vote_count + change["voteIncrease"]
+                result["voteIncrease"] = change["voteIncrease"]
+                table.set(employee_id, "dailyvote", result["newdailyvoteCount"])
+
+            results.append(result)
+
+        table.flush()
+        return results, True
+
+def rejected_results(employee_ids, errors):
+    """Per-row results of a rejected batch; `errors` holds None for valid rows"""
+    return [
+        {"employeeId": employee_id, "success": False, "status": "invalid", "message": error}
+        if error else
+        {"employeeId": employee_id, "success": False, "status": "notApplied",
+         "message": "Not applied, the batch has invalid rows"}
+        for employee_id, error in zip(employee_ids, errors)
+    ]
+
+def parse_flag(value, default=True):
+    """Read a true / false flag given as a JSON bool or a form / query string"""
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() not in ("0", "false", "no", "off")
+
+def trigger_sync():
+    """Push data.xlsx to Google Sheets in the background"""
+    def run():
+        try:
+            sync_to_sheet()
+        except Exception as e:
+            log(f"❌ Background sync failed: {e}")
+    threading.Thread(target=run, daemon=True).start()
+
+def read_bulk_changes():
+    """
+    Read bulk admin changes from a JSON body {"changes": [...]} or from an
+    uploaded CSV file (form field "file") with columns employeeId, newName,
+    voteIncrease. Returns a list of dicts or raises ValueError.
+    """
+    if "file" in request.files:
+        try:
+            text = request.files["file"].read().decode("utf-8-sig")
+        except UnicodeDecodeError:
+            raise ValueError("CSV file must be UTF-8")
+        reader = csv.DictReader(io.StringIO(text))
+        if not reader.fieldnames or "employeeId" not in reader.fieldnames:
+            raise ValueError("CSV header must include employeeId")
+        return list(reader)
+
+    data = request.get_json(silent=True) or {}
+    changes = data.get("changes")
+    if not isinstance(changes, list):
+        raise ValueError("Body must be {\"changes\": [...]} or a CSV upload")
+    return changes
+
+# ======================
+# Snapshot Helpers
+# ======================
+def save_snapshot():
+    """
+    Write a binary snapshot of the employee table, vote indexes and the last
+    vote sequence number. Skipped when nothing changed since the last snapshot.
+    """
+    with data_lock:
+        with state_lock:
+            marker = (vote_index.last_seq, table.applied_seq, table.signature)
+            if marker == snapshot_state["marker"]:
+                return False
+            state = {
+                "version": SNAPSHOT_VERSION,
+                "last_seq": vote_index.last_seq,
+                "employees": table.export_state() if table.rows is not None else None,
+                "timeline": timeline.export_state(),
+                "vote_index": vote_index.export_state()
+            }
+
+    write_snapshot(SNAPSHOT_FILE, state)
+    snapshot_state["marker"] = marker
+    return True
+
+def restore_table(snapshot):
+    """
+    Restore the employee table from a snapshot if data.xlsx has not changed
+    since, otherwise reload it. Then re-apply votes newer than the table.
+    """
+    with data_lock:
+        try:
+            employees = snapshot["employees"] if snapshot else None
+            if employees is not None and employees["signature"] == table.file_signature():
+                table.restore(employees)
+                table.apply_votes(read_votes(table.applied_seq))
+            else:
+                load_table()
+        except FileNotFoundError:
+            log(f"⚠️ {DATA_FILE} not found")
+
+def load_state():
+    """
+    Restore in-memory state from the latest snapshot and replay only the vote
+    records appended after it. Falls back to a full rebuild from the vote
+    history when the snapshot is missing, corrupt or out of date.
+    """
+    started = time.perf_counter()
+
+    # First start after upgrading: split vote_history.json into segments
+    migrated = migrate_legacy_history()
+    if migrated:
+        log(f"✅ Migrated {migrated} vote records to {HISTORY_DIR}/")
+    recover_segments()
+
+    snapshot = load_snapshot(SNAPSHOT_FILE)
+    if snapshot is not None and (
+        snapshot.get("version") != SNAPSHOT_VERSION
+        or snapshot["last_seq"] > last_seq()
+    ):
+        snapshot = None
+
+    restore_table(snapshot)
+    genders = read_genders()
+
+    if snapshot is None:
+        records = read_votes(0)
+        with state_lock:
+            timeline.rebuild(records, genders)
+            vote_index.rebuild(records)
+        log(f"✅ Rebuilt state from {len(records)} vote records in {time.perf_counter() - started:.3f}s")
+        return
+
+    records = read_votes(snapshot["last_seq"])
+    with state_lock:
+        timeline.load_state(snapshot["timeline"])
+        vote_index.load_state(snapshot["vote_index"])
+        for record in records:
+            vote_index.add(record["voterId"], record["candidateId"], record["time"],
+                           record.get("votecount", 0), record.get("seq"))
+            timeline.add(record["candidateId"], genders.get(str(record["candidateId"])),
+                         record["time"], record.get("votecount", 0))
+    log(f"✅ Loaded snapshot and replayed {len(records)} vote records in {time.perf_counter() - started:.3f}s")
+
+def snapshot_loop():
+    """Background thread writing a snapshot every SNAPSHOT_INTERVAL seconds"""
+    while True:
+        time.sleep(SNAPSHOT_INTERVAL)
+        try:
+            save_snapshot()
+        except Exception as e:
+            log(f"❌ Snapshot failed: {e}")
+
+def shutdown():
+    """Save pending cell changes and a final snapshot on exit"""
+    with data_lock:
+        if table.rows is not None and not table.is_stale():
+            table.flush()
+    save_snapshot()
+
+load_state()
+threading.Thread(target=flush_loop, daemon=True).start()
+threading.Thread(target=snapshot_loop, daemon=True).start()
+atexit.register(shutdown)
+
+def parse_page_args():
+    """Read `limit` / `cursor` query args. Returns (cursor, limit) or raises ValueError."""
+    cursor = request.args.get("cursor") or None
+    limit = request.args.get("limit")
+    if limit is None:
+        return cursor, None
+    limit = int(limit)
+    if limit <= 0:
+        raise ValueError("limit must be positive")
+    return cursor, min(limit, MAX_PAGE_LIMIT)
+
 # ======================
 # Routes
 # ======================
@@ -105,7 +435,7 @@ def login():
     if not employee_id:
         return jsonify({"success": False, "message": "Employee ID required"}), 400
 
-    emp, _ = find_employee(employee_id)
+    emp = find_employee(employee_id)
     if not emp:
         return jsonify({"success": False, "message": "Invalid Employee ID"}), 401
 
@@ -165,78 +495,122 @@ def vote():
     if vote_count <= 0:
         return jsonify({"success": False, "message": "Invalid vote count"}), 400
 
-    rows = read_excel()
-
-    voter = None
-    candidate = None
-
-    for r in rows:
-        if str(r["employeeId"]) == str(voter_id):
-            voter = r
-        if str(r["employeeId"]) == str(candidate_id):
-            candidate = r
-
-    if not voter or not candidate:
-        return jsonify({"success": False, "message": "Invalid employee"}), 400
-
-    if int(voter["dailyvote"]) < vote_count:
-        return jsonify({"success": False, "message": "Not enough daily votes"}), 400
-
-    voter["dailyvote"] = int(voter["dailyvote"]) - vote_count
-    candidate["votecount"] = int(candidate["votecount"]) + vote_count
-
-    write_excel(rows)
-
-    log_vote(str(voter_id), str(candidate_id), vote_count)
+    daily_vote_remaining, error = commit_vote(voter_id, candidate_id, vote_count)
+    if error:
+        return jsonify({"success": False, "message": error}), 400
 
     return jsonify({
         "success": True,
         "votesUsed": vote_count,
-        "dailyVoteRemaining": int(voter["dailyvote"])
+        "dailyVoteRemaining": daily_vote_remaining
     })
 
 @app.route("/api/vote-history/<employee_id>", methods=["GET"])
 def get_vote_history(employee_id):
-    """Get vote history for a specific employee"""
-    history = read_vote_history()
-    employee_history = history.get(employee_id, [])
-    
-    return jsonify({
+    """
+    Get vote history for a specific employee
+    GET /api/vote-history/<employee_id>?limit=50&cursor=<nextCursor>
+    """
+    try:
+        cursor, limit = parse_page_args()
+        catch_up_index()
+        history, next_cursor = vote_index.votes_cast(employee_id, cursor, limit)
+    except ValueError:
+        return jsonify({"success": False, "message": "Invalid limit or cursor"}), 400
+
+    return json_response({
         "success": True,
         "employeeId": employee_id,
-        "history": employee_history
+        "history": history,
+        "nextCursor": next_cursor
     })
 
 @app.route("/api/votes-received/<employee_id>", methods=["GET"])
 def get_votes_received(employee_id):
-    """Get who voted for a specific employee (candidate)"""
-    history = read_vote_history()
-    
-    voters = []
-    total_votes = 0
-    
-    # Loop through all voters in history
-    for voter_id, vote_records in history.items():
-        # Check each vote record
-        for vote in vote_records:
-            if vote.get("candidateId") == employee_id:
-                voters.append({
-                    "voterId": voter_id,
-                    "time": vote.get("time"),
-                    "votecount": vote.get("votecount")
-                })
-                total_votes += vote.get("votecount", 0)
-    
-    # Sort by time (most recent first)
-    voters.sort(key=lambda x: x["time"], reverse=True)
-    
-    return jsonify({
+    """
+    Get who voted for a specific employee (candidate), most recent first
+    GET /api/votes-received/<employee_id>?limit=50&cursor=<nextCursor>
+    """
+    try:
+        cursor, limit = parse_page_args()
+        catch_up_index()
+        voters, next_cursor = vote_index.votes_received(employee_id, cursor, limit)
+    except ValueError:
+        return jsonify({"success": False, "message": "Invalid limit or cursor"}), 400
+
+    total_votes, voter_count = vote_index.received_summary(employee_id)
+
+    return json_response({
         "success": True,
         "candidateId": employee_id,
         "totalVotesReceived": total_votes,
-        "voterCount": len(voters),
-        "voters": voters
+        "voterCount": voter_count,
+        "voters": voters,
+        "nextCursor": next_cursor
+    })
+
+@app.route("/api/analytics/timeline", methods=["GET"])
+def get_vote_timeline():
+    """
+    Get vote counts bucketed over time
+    GET /api/analytics/timeline?bucket=hour&from=<ISO>&to=<ISO>&candidateId=<id>&gender=<0|1>
+    """
+    bucket = request.args.get("bucket", "hour")
+    if bucket not in BUCKET_SIZES:
+        return jsonify({
+            "success": False,
+            "message": f"Invalid bucket, expected one of: {', '.join(BUCKET_SIZES)}"
+        }), 400
+
+    try:
+        start = parse_time(request.args["from"]) if request.args.get("from") else None
+        end = parse_time(request.args["to"]) if request.args.get("to") else None
+    except ValueError:
+        return jsonify({"success": False, "message": "Invalid time range"}), 400
+
+    candidate_id = request.args.get("candidateId", "").strip()
+    gender = request.args.get("gender", "").strip()
+
+    catch_up_index()
+    buckets = timeline.query(bucket, start, end, candidate_id, gender)
+
+    return jsonify({
+        "success": True,
+        "bucket": bucket,
+        "candidateId": candidate_id or None,
+        "gender": gender or None,
+        "totalVotes": sum(votes for _, votes in buckets),
+        "buckets": [
+            {
+                "time": datetime.fromtimestamp(t, VN_TZ).isoformat(),
+                "votes": votes
+            } for t, votes in buckets
+        ]
     })
+
+@app.route("/api/analytics/totals", methods=["GET"])
+def get_vote_totals():
+    """
+    Get votes received per candidate within a time range
+    GET /api/analytics/totals?from=<ISO>&to=<ISO>
+    """
+    try:
+        start = parse_time(request.args["from"]) if request.args.get("from") else None
+        end = parse_time(request.args["to"]) if request.args.get("to") else None
+    except ValueError:
+        return jsonify({"success": False, "message": "Invalid time range"}), 400
+
+    totals, stats = range_totals(start, end)
+
+    return json_response({
+        "success": True,
+        "from": request.args.get("from"),
+        "to": request.args.get("to"),
+        "totalVotes": sum(totals.values()),
+        "totals": totals,
+        "segments": stats
+    })
+
 @app.route("/api/admin/update-name", methods=["POST"])
 def update_employee_name():
     """
@@ -257,21 +631,14 @@ def update_employee_name():
     if not new_name:
         return jsonify({"success": False, "message": "New name required"}), 400
 
-    rows = read_excel()
-    employee_found = False
-
-    for r in rows:
-        if str(r["employeeId"]) == str(employee_id):
-            old_name = r.get("englishname", "")
-            r["englishname"] = new_name
-            employee_found = True
-            break
+    results, applied = apply_admin_changes([
+        {"employeeId": employee_id, "newName": new_name, "voteIncrease": None}
+    ])
 
-    if not employee_found:
+    if not applied:
         return jsonify({"success": False, "message": "Employee not found"}), 404
 
-    # Save changes
-    write_excel(rows)
+    old_name = results[0]["oldName"]
 
     return jsonify({
         "success": True,
@@ -305,22 +672,15 @@ def increase_vote_count():
     if vote_increase <= 0:
         return jsonify({"success": False, "message": "Vote increase must be positive"}), 400
 
-    rows = read_excel()
-    employee_found = False
-
-    for r in rows:
-        if str(r["employeeId"]) == str(employee_id):
-            old_vote_count = int(r.get("dailyvote", 0))
-            new_vote_count = old_vote_count + vote_increase
-            r["dailyvote"] = new_vote_count
-            employee_found = True
-            break
+    results, applied = apply_admin_changes([
+        {"employeeId": employee_id, "newName": "", "voteIncrease": vote_increase}
+    ])
 
-    if not employee_found:
+    if not applied:
         return jsonify({"success": False, "message": "Employee not found"}), 404
 
-    # Save changes
-    write_excel(rows)
+    old_vote_count = results[0]["olddailyvoteCount"]
+    new_vote_count = results[0]["newdailyvoteCount"]
 
     return jsonify({
         "success": True,
@@ -330,6 +690,71 @@ def increase_vote_count():
         "newdailyvoteCount": new_vote_count,
         "voteIncrease": vote_increase
     })
+@app.route("/api/admin/bulk", methods=["POST"])
+def bulk_admin_update():
+    """
+    Update English names and / or increase daily votes for many employees at once
+    POST /api/admin/bulk
+    Body: {
+        "changes": [
+            {"employeeId": "T0699", "newName": "John Doe"},
+            {"employeeId": "T0700", "voteIncrease": 10}
+        ],
+        "sync": true
+    }
+    or multipart/form-data with a CSV "file" (columns employeeId, newName, voteIncrease)
+    and an optional "sync" form field / query arg.
+    All rows are validated first; if any row is invalid nothing is applied.
+    """
+    started = time.perf_counter()
+
+    try:
+        raw_changes = read_bulk_changes()
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    if not raw_changes:
+        return jsonify({"success": False, "message": "No changes given"}), 400
+    if len(raw_changes) > MAX_BULK_ROWS:
+        return jsonify({"success": False, "message": f"At most {MAX_BULK_ROWS} rows per batch"}), 400
+
+    changes = []
+    errors = []
+    for change in raw_changes:
+        parsed, error = parse_admin_change(change)
+        changes.append(parsed)
+        errors.append(error)
+
+    if any(errors):
+        employee_ids = [
+            str(change.get("employeeId") or "").strip() if isinstance(change, dict) else ""
+            for change in raw_changes
+        ]
+        results, applied = rejected_results(employee_ids, errors), False
+    else:
+        results, applied = apply_admin_changes(changes)
+
+    if request.is_json:
+        sync = parse_flag((request.get_json(silent=True) or {}).get("sync"))
+    else:
+        sync = parse_flag(request.values.get("sync"))
+    if applied and sync:
+        trigger_sync()
+
+    for i, result in enumerate(results, start=1):
+        result["row"] = i
+
+    failed = sum(1 for r in results if r["status"] == "invalid")
+    return json_response({
+        "success": applied,
+        "message": f"Applied {len(results)} changes" if applied else f"{failed} invalid rows, nothing applied",
+        "applied": len(results) if applied else 0,
+        "failed": failed,
+        "syncTriggered": bool(applied and sync),
+        "elapsedMs": round((time.perf_counter() - started) * 1000, 1),
+        "results": results
+    }, 200 if applied else 400)
+
 @app.route("/api/sync/from-sheet", methods=["POST"])
 def sync_from_sheet_endpoint():
     """
@@ -353,6 +778,11 @@ def sync_to_sheet_endpoint():
     POST /api/sync/to-sheet
     """
     try:
+        # Save pending vote counts first so the sheet gets the latest numbers
+        with data_lock:
+            ensure_table()
+            table.flush()
+
         # Call the sync_to_sheet function from sync.py
         # It doesn't return anything, so we catch exceptions to determine success
         sync_to_sheet()
@@ -0,0 +1,189 @@
+"""
+Benchmark sync_to_sheet() and sync_from_sheet() against a local FakeWorksheet,
+without touching Google Sheets or its quota.
+
+Usage:
+    python bench_sync.py
+    python bench_sync.py --rows 100,1000,5000 --latency 0.05 --error-rate 0.1
+    python bench_sync.py --json bench.json        # save results as a baseline
+    python bench_sync.py --compare bench.json     # exit 1 if calls / cells / bytes grew
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import types
+import pandas as pd
+
+import sync
+from fake_sheet import FakeWorksheet
+
+HEADERS = ["STT", "vnname", "englishname", "avatar", "employeeId", "dailyvote", "votecount", "gender"]
+
+# Deterministic metrics compared against a baseline; wall time is only reported
+COMPARED_METRICS = ("calls", "cells", "bytes")
+
+
+def synthetic_rows(n):
+    return [
+        {
+            "STT": i,
+            "vnname": f"Nguyễn Văn {i}",
+            "englishname": f"Employee {i}",
+            "avatar": f"/avatars/{i}.jpg",
+            "employeeId": f"EMP{i:05d}",
+            "dailyvote": 5,
+            "votecount": i % 37,
+            "gender": i % 2
+        }
+        for i in range(1, n + 1)
+    ]
+
+
+@contextlib.contextmanager
+def rate_limit_sleeps(enabled):
+    """Optionally replace the time.sleep() calls inside sync.py with no-ops"""
+    if enabled:
+        yield
+        return
+    original = sync.time
+    sync.time = types.SimpleNamespace(sleep=lambda seconds: None)
+    try:
+        yield
+    finally:
+        sync.time = original
+
+
+def run_once(fn, ws):
+    """Run one sync call quietly. Returns (seconds, error message or None)."""
+    ws.reset_calls()
+    error = None
+    started = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = fn(ws)
+        if isinstance(result, dict) and not result.get("success"):
+            error = result.get("message")
+    except Exception as e:
+        error = str(e)
+    return time.perf_counter() - started, error
+
+
+def bench_size(n, args):
+    rows = synthetic_rows(n)
+    sheet_values = [HEADERS] + [[str(r[h]) for h in HEADERS] for r in rows]
+    results = []
+
+    for direction, fn in (("to-sheet", sync.sync_to_sheet), ("from-sheet", sync.sync_from_sheet)):
+        timings = []
+        errors = 0
+        summaries = []
+        for i in range(args.repeat):
+            # Each run starts from the same workbook and sheet contents
+            pd.DataFrame(rows).to_excel(sync.DATA_FILE, index=False, engine='openpyxl')
+            ws = FakeWorksheet(sheet_values, latency=args.latency,
+                               error_rate=args.error_rate, seed=args.seed + i)
+            seconds, error = run_once(fn, ws)
+            timings.append(seconds)
+            summary = ws.summary()
+            # Failed or retried runs make a different number of calls, so only
+            # clean runs count towards calls / cells / bytes
+            if error or summary["errors"]:
+                errors += 1
+            else:
+                summaries.append(summary)
+
+        results.append({
+            "direction": direction,
+            "rows": n,
+            "seconds": statistics.median(timings),
+            "calls": max((s["calls"] for s in summaries), default=None),
+            "cells": max((s["cells"] for s in summaries), default=None),
+            "bytes": max((s["bytes"] for s in summaries), default=None),
+            "methods": summaries[-1]["methods"] if summaries else {},
+            "cleanRuns": len(summaries),
+            "failedRuns": errors
+        })
+
+    return results
+
+
+def compare(results, baseline_file, tolerance):
+    """Return a list of regressions versus a results file saved with --json"""
+    with open(baseline_file, "r", encoding="utf-8") as f:
+        baseline = {(r["direction"], r["rows"]): r for r in json.load(f)["results"]}
+
+    regressions = []
+    for r in results:
+        base = baseline.get((r["direction"], r["rows"]))
+        if not base:
+            continue
+        for metric in COMPARED_METRICS:
+            if base[metric] is None or r[metric] is None:
+                continue
+            if r[metric] > base[metric] * (1 + tolerance):
+                regressions.append(
+                    f"{r['direction']} @ {r['rows']} rows: {metric} {base[metric]} -> {r[metric]}"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", default="100,1000,5000", help="Comma-separated sheet sizes")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per size (median time is reported)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every API call")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of calls failing with RESOURCE_EXHAUSTED")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for injected errors")
+    parser.add_argument("--with-sleeps", action="store_true", help="Keep the rate-limit sleeps in sync.py")
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--compare", help="Compare against results saved with --json")
+    parser.add_argument("--tolerance", type=float, default=0.0, help="Allowed relative growth for --compare")
+    args = parser.parse_args()
+
+    sizes = [int(n) for n in args.rows.split(",") if n.strip()]
+    cwd = os.getcwd()
+    results = []
+
+    # sync.py works on relative paths (data.xlsx, locks/, logs/), so run in a scratch directory
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        os.makedirs("locks", exist_ok=True)
+        try:
+            with rate_limit_sleeps(args.with_sleeps):
+                for n in sizes:
+                    results.extend(bench_size(n, args))
+        finally:
+            os.chdir(cwd)
+
+    print(f"{'direction':<11} {'rows':>7} {'time (s)':>9} {'calls':>6} {'cells':>9} {'bytes':>11} {'failed':>7}")
+    for r in results:
+        print(f"{r['direction']:<11} {r['rows']:>7} {r['seconds']:>9.3f} {str(r['calls']):>6} "
+              f"{str(r['cells']):>9} {str(r['bytes']):>11} {r['failedRuns']:>7}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+    if args.compare:
+        failed = [r for r in results if r["failedRuns"]]
+        if failed:
+            # calls / cells / bytes of failed runs are not comparable
+            print(f"❌ Not comparing: {len(failed)} results include failed runs "
+                  f"(use --error-rate 0 for --compare)")
+            sys.exit(1)
+        regressions = compare(results, args.compare, args.tolerance)
+        for line in regressions:
+            print(f"❌ Regression: {line}")
+        if regressions:
+            sys.exit(1)
+        print("✅ No regression in calls, cells or bytes")
+
+
+if __name__ == "__main__":
+    main()
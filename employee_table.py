@@ -0,0 +1,283 @@
+import os
+import tempfile
+import threading
+from openpyxl import load_workbook
+from vote_store import last_seq, read_votes
+
+# Hidden sheet recording the last vote (by seq) included in the saved counts
+META_SHEET = "_meta"
+
+
+class EmployeeTable:
+    """
+    data.xlsx held in memory.
+
+    Changes update the row dicts and are remembered as dirty cells; a flush
+    patches only those cells into the cached workbook and saves it once for
+    all changes since the previous flush. Saving still rewrites the whole
+    file, so its cost grows with the number of rows; begin_flush() /
+    write_flush() / finish_flush() let the caller do that part without the
+    data lock. The callers hold the data lock around every other method.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.columns = []
+        self.rows = None
+        self.signature = None
+        self.applied_seq = 0    # last vote seq reflected in rows
+        self.dirty = {}         # (employeeId, column) -> value not saved yet
+        self.in_flight = {}     # cells of a flush between begin_flush() and finish_flush()
+        self._index = {}
+        self._workbook = None
+        # Held while the cached workbook is patched and saved, so a save
+        # running outside the data lock never sees it change
+        self._save_lock = threading.Lock()
+
+    def file_signature(self):
+        """(mtime, size) of the workbook, used to detect changes made by other tools"""
+        st = os.stat(self.path)
+        return (st.st_mtime_ns, st.st_size)
+
+    def is_stale(self):
+        return self.rows is None or self.file_signature() != self.signature
+
+    def _set_rows(self, columns, rows):
+        self.columns = columns
+        self.rows = rows
+        self._index = {str(r.get("employeeId")): r for r in rows}
+
+    # ======================
+    # Load / Restore
+    # ======================
+    def load(self):
+        """
+        Parse the workbook, dropping unsaved changes.
+        Returns the vote seq stored in the _meta sheet, or None for workbooks
+        written by other tools (sync_from_sheet, recal_votes.py, ...).
+        """
+        wb = load_workbook(self.path)
+        values = wb.worksheets[0].iter_rows(values_only=True)
+        columns = ["" if c is None else str(c) for c in next(values, ())]
+        rows = [
+            {col: ("" if val is None else val) for col, val in zip(columns, row)}
+            for row in values
+            if any(val is not None for val in row)
+        ]
+
+        self._set_rows(columns, rows)
+        self._workbook = wb
+        self.dirty = {}
+        self.in_flight = {}
+        self.signature = self.file_signature()
+
+        return _meta_seq(wb)
+
+    def export_state(self):
+        """
+        Copy of the table for snapshots. Cells of a flush still being written
+        count as unsaved, since the snapshot carries the old file signature.
+        """
+        return {
+            "columns": list(self.columns),
+            "rows": [dict(r) for r in self.rows],
+            "signature": self.signature,
+            "applied_seq": self.applied_seq,
+            "dirty": {**self.in_flight, **self.dirty}
+        }
+
+    def restore(self, state):
+        """Restore a table from export_state(). The workbook itself is parsed on the next flush."""
+        self._set_rows(state["columns"], state["rows"])
+        self.signature = state["signature"]
+        self.applied_seq = state["applied_seq"]
+        self.dirty = state["dirty"]
+        self.in_flight = {}
+        self._workbook = None
+
+    # ======================
+    # Changes
+    # ======================
+    def find(self, employee_id):
+        return self._index.get(str(employee_id))
+
+    def set(self, employee_id, column, value):
+        """Change one cell. Returns False if the employee does not exist."""
+        row = self.find(employee_id)
+        if row is None:
+            return False
+        row[column] = value
+        self.dirty[(str(employee_id), column)] = value
+        return True
+
+    def apply_vote(self, voter_id, candidate_id, vote_count, seq):
+        """Move `vote_count` from the voter's dailyvote to the candidate's votecount"""
+        voter, candidate = self.find(voter_id), self.find(candidate_id)
+        if voter is not None and candidate is not None:
+            self.set(voter_id, "dailyvote", int(voter["dailyvote"]) - vote_count)
+            self.set(candidate_id, "votecount", int(candidate["votecount"]) + vote_count)
+        self.applied_seq = max(self.applied_seq, seq)
+
+    def apply_votes(self, records):
+        """Apply vote history records newer than applied_seq, in seq order"""
+        for record in records:
+            if record["seq"] > self.applied_seq:
+                self.apply_vote(record["voterId"], record["candidateId"],
+                                record.get("votecount", 0), record["seq"])
+
+    # ======================
+    # Persist
+    # ======================
+    def _patch_workbook(self, wb):
+        ws = wb.worksheets[0]
+        header = [c.value for c in ws[1]]
+        id_col = header.index("employeeId") + 1
+        sheet_rows = {
+            str(ws.cell(row=r, column=id_col).value): r
+            for r in range(2, ws.max_row + 1)
+        }
+        for (employee_id, column), value in self.dirty.items():
+            if employee_id not in sheet_rows:
+                continue
+            if column not in header:
+                header.append(column)
+                ws.cell(row=1, column=len(header), value=column)
+            ws.cell(row=sheet_rows[employee_id], column=header.index(column) + 1, value=value)
+
+    def begin_flush(self, force=False):
+        """
+        First step of a flush, with the data lock held: patch the dirty cells
+        and applied_seq into the cached workbook. `force` saves even without
+        changes, e.g. to record applied_seq.
+        Returns the pending flush for write_flush() / finish_flush(), or None
+        if there is nothing to save.
+        """
+        if not self.dirty and not force:
+            return None
+
+        self._save_lock.acquire()
+        try:
+            wb = self._workbook or load_workbook(self.path)
+            self._patch_workbook(wb)
+
+            if META_SHEET not in wb.sheetnames:
+                meta = wb.create_sheet(META_SHEET)
+                meta.sheet_state = "hidden"
+                meta["A1"] = "appliedSeq"
+            wb[META_SHEET]["B1"] = self.applied_seq
+        except Exception:
+            self._save_lock.release()
+            raise
+
+        pending = {
+            "workbook": wb,
+            "signature": self.signature,
+            "dirty": self.dirty,
+            "error": None
+        }
+        self._workbook = wb
+        self.in_flight = self.dirty
+        self.dirty = {}
+        return pending
+
+    def write_flush(self, pending):
+        """
+        Second step, without the data lock: save the workbook to a temporary
+        file next to data.xlsx. This is the slow part of a flush.
+        """
+        try:
+            fd, pending["tmp_path"] = tempfile.mkstemp(
+                prefix=os.path.basename(self.path) + ".", suffix=".tmp.xlsx",
+                dir=os.path.dirname(os.path.abspath(self.path))
+            )
+            os.close(fd)
+            pending["workbook"].save(pending["tmp_path"])
+        except Exception as e:
+            pending["error"] = e
+        finally:
+            self._save_lock.release()
+
+    def finish_flush(self, pending):
+        """
+        Last step, with the data lock held: swap the saved file in, so readers
+        never see a partial file. Nothing is swapped if data.xlsx was saved or
+        reloaded since begin_flush(): either a later flush of this table
+        already includes the changes, or the table reloads from the new file
+        and replays the votes it lacks.
+        Returns True if the workbook was saved.
+        """
+        tmp_path = pending.get("tmp_path")
+        if self.in_flight is pending["dirty"]:
+            self.in_flight = {}
+        try:
+            unchanged = (self.signature == pending["signature"]
+                         and self.file_signature() == pending["signature"])
+            if pending["error"] is not None:
+                if unchanged:
+                    # Keep the changes for the next flush
+                    self.dirty = {**pending["dirty"], **self.dirty}
+                raise pending["error"]
+            if not unchanged:
+                return False
+
+            os.replace(tmp_path, self.path)
+            tmp_path = None
+            self.signature = self.file_signature()
+            return True
+        finally:
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def flush(self, force=False):
+        """
+        Save all changes since the last flush in one write, keeping the data
+        lock for the whole save. Returns True if the workbook was saved.
+        """
+        pending = self.begin_flush(force)
+        if pending is None:
+            return False
+        self.write_flush(pending)
+        return self.finish_flush(pending)
+
+
+def _meta_seq(wb):
+    """applied_seq stored in the _meta sheet, or None"""
+    if META_SHEET not in wb.sheetnames:
+        return None
+    seq = wb[META_SHEET]["B1"].value
+    return int(seq) if seq is not None else None
+
+
+def read_applied_seq(path):
+    """applied_seq stored in a workbook, read without parsing its rows"""
+    wb = load_workbook(path, read_only=True)
+    try:
+        return _meta_seq(wb)
+    finally:
+        wb.close()
+
+
+def apply_pending_votes(path):
+    """
+    Bring a workbook saved by the app up to date with the vote history, so
+    tools reading or rewriting it (recal_votes.py, update_id.py,
+    sync_to_sheet) see every committed dailyvote / votecount change. The app
+    saves its table only every FLUSH_INTERVAL seconds, but the votes are
+    already in vote_history/. Caller holds the data lock.
+    Returns the number of votes applied.
+    """
+    latest = last_seq()
+    if not latest or not os.path.exists(path):
+        return 0
+    seq = read_applied_seq(path)
+    # Workbooks without _meta were written by a tool and are taken as current
+    if seq is None or seq >= latest:
+        return 0
+
+    table = EmployeeTable(path)
+    table.load()
+    table.applied_seq = seq
+    records = read_votes(seq)
+    table.apply_votes(records)
+    table.flush(force=True)
+    return len(records)
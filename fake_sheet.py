@@ -0,0 +1,123 @@
+import json
+import random
+import re
+import time
+import requests
+from gspread.exceptions import APIError
+
+
+def _a1_to_cell(label):
+    """Convert an A1 label ("B2") to 0-based (row, col)"""
+    match = re.fullmatch(r"([A-Za-z]+)(\d+)", label)
+    if not match:
+        raise ValueError(f"Unsupported range: {label}")
+    col = 0
+    for ch in match.group(1).upper():
+        col = col * 26 + (ord(ch) - ord("A") + 1)
+    return int(match.group(2)) - 1, col - 1
+
+
+def _payload_bytes(values):
+    return len(json.dumps(values, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def _cell_count(values):
+    return sum(len(row) for row in values)
+
+
+def resource_exhausted_error():
+    """An APIError like the one Google returns when the quota is exceeded"""
+    response = requests.Response()
+    response.status_code = 429
+    response._content = json.dumps({
+        "error": {
+            "code": 429,
+            "message": "Quota exceeded for quota metric 'Read requests' (RESOURCE_EXHAUSTED)",
+            "status": "RESOURCE_EXHAUSTED"
+        }
+    }).encode("utf-8")
+    return APIError(response)
+
+
+class FakeWorksheet:
+    """
+    Local stand-in for a gspread Worksheet, covering the calls sync.py makes
+    (row_values, get_all_values, update, batch_update).
+
+    Every call is recorded in `calls` with the number of cells and JSON bytes
+    sent or received. `latency` seconds are added to each call and a fraction
+    `error_rate` of calls fail with RESOURCE_EXHAUSTED.
+    """
+
+    def __init__(self, values=None, latency=0.0, error_rate=0.0, seed=0):
+        self.values = [list(row) for row in (values or [])]
+        self.latency = latency
+        self.error_rate = error_rate
+        self.calls = []
+        self._random = random.Random(seed)
+
+    def _call(self, method, cells, payload_bytes):
+        started = time.perf_counter()
+        if self.latency:
+            time.sleep(self.latency)
+        failed = self._random.random() < self.error_rate
+        self.calls.append({
+            "method": method,
+            "cells": cells,
+            "bytes": payload_bytes,
+            "seconds": time.perf_counter() - started,
+            "error": failed
+        })
+        if failed:
+            raise resource_exhausted_error()
+
+    def _write(self, range_name, values):
+        row, col = _a1_to_cell(range_name.split(":")[0])
+        for i, new_row in enumerate(values):
+            while len(self.values) <= row + i:
+                self.values.append([])
+            target = self.values[row + i]
+            while len(target) < col + len(new_row):
+                target.append("")
+            target[col:col + len(new_row)] = [str(v) for v in new_row]
+
+    def row_values(self, row, **kwargs):
+        result = list(self.values[row - 1]) if row <= len(self.values) else []
+        while result and result[-1] == "":
+            result.pop()
+        self._call("row_values", len(result), _payload_bytes(result))
+        return result
+
+    def get_all_values(self, **kwargs):
+        result = [list(row) for row in self.values]
+        self._call("get_all_values", _cell_count(result), _payload_bytes(result))
+        return result
+
+    def update(self, values=None, range_name=None, **kwargs):
+        values = values or []
+        self._call("update", _cell_count(values), _payload_bytes(values))
+        self._write(range_name or "A1", values)
+        return {"updatedCells": _cell_count(values)}
+
+    def batch_update(self, data, **kwargs):
+        cells = sum(_cell_count(d["values"]) for d in data)
+        self._call("batch_update", cells, _payload_bytes(data))
+        for d in data:
+            self._write(d["range"], d["values"])
+        return {"totalUpdatedCells": cells}
+
+    def reset_calls(self):
+        self.calls = []
+
+    def summary(self):
+        """Totals over recorded calls: count, cells, bytes, errors and per-method counts"""
+        methods = {}
+        for call in self.calls:
+            methods[call["method"]] = methods.get(call["method"], 0) + 1
+        return {
+            "calls": len(self.calls),
+            "cells": sum(c["cells"] for c in self.calls),
+            "bytes": sum(c["bytes"] for c in self.calls),
+            "errors": sum(1 for c in self.calls if c["error"]),
+            "methods": methods
+        }
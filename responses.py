@@ -0,0 +1,45 @@
+import gzip
+import json
+from flask import Response, request
+
+# Optional faster encoders / compressors, used when installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed
+COMPRESS_MIN_SIZE = 1024
+
+
+def dumps(payload):
+    """Encode payload as compact UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def json_response(payload, status=200):
+    """
+    Build a JSON response, compressed with br or gzip when the client accepts it
+    and the body is large enough to be worth it.
+    """
+    body = dumps(payload)
+    headers = {"Vary": "Accept-Encoding"}
+
+    if len(body) >= COMPRESS_MIN_SIZE:
+        # Quality 0 means "not acceptable"; "*" covers encodings not listed
+        accepted = request.accept_encodings
+        if brotli is not None and accepted["br"] > 0:
+            body = brotli.compress(body, quality=4)
+            headers["Content-Encoding"] = "br"
+        elif accepted["gzip"] > 0:
+            body = gzip.compress(body, compresslevel=5)
+            headers["Content-Encoding"] = "gzip"
+
+    return Response(body, status=status, mimetype="application/json", headers=headers)
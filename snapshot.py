@@ -0,0 +1,56 @@
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+import zlib
+
+# File layout: magic | crc32 of payload | payload length | pickled payload
+SNAPSHOT_MAGIC = b"OSNSNAP1"
+HEADER = struct.Struct("<8sIQ")
+
+
+def write_snapshot(path, state):
+    """Atomically write `state` to a checksummed binary snapshot"""
+    payload = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+    header = HEADER.pack(SNAPSHOT_MAGIC, zlib.crc32(payload), len(payload))
+
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    # A temporary file per writer, so snapshots of several app processes never mix
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(header)
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return HEADER.size + len(payload)
+
+
+def load_snapshot(path):
+    """
+    Load a snapshot written by write_snapshot().
+    Returns None if the file is missing, truncated or fails its checksum.
+    """
+    try:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < HEADER.size:
+                return None
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                magic, checksum, length = HEADER.unpack_from(mm, 0)
+                if magic != SNAPSHOT_MAGIC or HEADER.size + length != size:
+                    return None
+                with memoryview(mm)[HEADER.size:] as payload:
+                    if zlib.crc32(payload) != checksum:
+                        return None
+                    return pickle.loads(payload)
+    except (OSError, ValueError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
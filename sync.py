@@ -6,6 +6,7 @@ import os
 import pandas as pd
 import time
 from datetime import datetime
+from employee_table import apply_pending_votes
 
 load_dotenv()
 
@@ -15,9 +16,16 @@ SHEET_ID = os.getenv("SHEET_ID")
 LOG_FILE = "logs/sync.log"
 SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
 
-# Initialize client globally so it can be reused
-creds = Credentials.from_service_account_file("credentials.json", scopes=SCOPES)
-client = gspread.authorize(creds)
+# Client is created on first use and then reused, so importing this module
+# (e.g. from bench_sync.py) does not require credentials.json
+client = None
+
+def get_worksheet():
+    global client
+    if client is None:
+        creds = Credentials.from_service_account_file("credentials.json", scopes=SCOPES)
+        client = gspread.authorize(creds)
+    return client.open_by_key(SHEET_ID).worksheet("Employees")
 
 def log(message):
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -28,9 +36,11 @@ def log(message):
     with open(LOG_FILE, "a") as f:
         f.write(log_msg + "\n")
 
-def sync_to_sheet():
+def sync_to_sheet(ws=None):
+    """Push data.xlsx to the Employees worksheet (or to `ws` if given)"""
     try:
-        ws = client.open_by_key(SHEET_ID).worksheet("Employees")
+        if ws is None:
+            ws = get_worksheet()
         
         # Get header row from Google Sheet to determine column order
         log("📋 Reading header row from Google Sheet...")
@@ -43,8 +53,9 @@ def sync_to_sheet():
         
         log(f"📊 Google Sheet columns: {sheet_headers}")
         
-        # Read Excel file
+        # Read Excel file, with votes the app has not saved to it yet
         with FileLock(LOCK_FILE):
+            apply_pending_votes(DATA_FILE)
             df = pd.read_excel(DATA_FILE, engine='openpyxl')
         
         log(f"📁 Excel file columns: {list(df.columns)}")
@@ -118,10 +129,11 @@ if __name__ == "__main__":
     sync_to_sheet()
 
 
-def sync_from_sheet():
-    """Pull data from Google Sheets and save to Excel"""
+def sync_from_sheet(ws=None):
+    """Pull data from Google Sheets (or from `ws` if given) and save to Excel"""
     try:
-        ws = client.open_by_key(SHEET_ID).worksheet("Employees")
+        if ws is None:
+            ws = get_worksheet()
         
         log("📥 Syncing FROM Google Sheet TO Excel...")
         time.sleep(0.3)  # Rate limit protection
@@ -0,0 +1,55 @@
+from openpyxl import Workbook
+
+from employee_table import EmployeeTable
+
+
+def make_workbook(path):
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["employeeId", "englishname", "dailyvote", "votecount"])
+    ws.append(["E001", "Voter", 10, 0])
+    ws.append(["E002", "Candidate", 10, 0])
+    wb.save(path)
+
+
+def test_snapshot_during_flush_keeps_unsaved_cells(tmp_path):
+    """
+    A snapshot taken while a flush is being written, followed by a crash
+    before the file is swapped in, must still restore the vote as unsaved.
+    """
+    path = str(tmp_path / "data.xlsx")
+    make_workbook(path)
+
+    table = EmployeeTable(path)
+    table.load()
+    table.apply_vote("E001", "E002", 4, 1)
+
+    pending = table.begin_flush()
+    table.write_flush(pending)
+    state = table.export_state()
+    # Crash here: finish_flush() never runs, data.xlsx is unchanged
+
+    restarted = EmployeeTable(path)
+    assert state["signature"] == restarted.file_signature()
+    restarted.restore(state)
+    assert restarted.flush()
+
+    saved = EmployeeTable(path)
+    assert saved.load() == 1
+    assert saved.find("E001")["dailyvote"] == 6
+    assert saved.find("E002")["votecount"] == 4
+
+
+def test_finished_flush_clears_unsaved_cells(tmp_path):
+    path = str(tmp_path / "data.xlsx")
+    make_workbook(path)
+
+    table = EmployeeTable(path)
+    table.load()
+    table.apply_vote("E001", "E002", 4, 1)
+
+    pending = table.begin_flush()
+    table.write_flush(pending)
+    assert table.finish_flush(pending)
+    assert table.export_state()["dirty"] == {}
+    assert table.export_state()["signature"] == table.file_signature()
@@ -0,0 +1,25 @@
+import os
+
+import vote_store
+
+
+def vote(voter_id):
+    return {"voterId": voter_id, "candidateId": "E002",
+            "time": "2026-01-26T10:00:00+07:00", "votecount": 1}
+
+
+def test_append_after_interrupted_write(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("locks")
+    assert vote_store.append_vote(vote("E001")) == 1
+    assert vote_store.append_vote(vote("E003")) == 2
+
+    # An interrupted write leaves a partial line at the end of the open segment
+    segment = os.path.join(vote_store.HISTORY_DIR, "2026-01-26.000.jsonl")
+    with open(segment, "a", encoding="utf-8") as f:
+        f.write('{"voterId":"E004","cand')
+
+    assert vote_store.append_vote(vote("E005")) == 3
+    assert vote_store.append_vote(vote("E006")) == 4
+    assert [r["seq"] for r in vote_store.read_votes(0)] == [1, 2, 3, 4]
+    assert [r["voterId"] for r in vote_store.read_votes(2)] == ["E005", "E006"]
@@ -0,0 +1,114 @@
+import threading
+from datetime import datetime
+import pytz
+
+VN_TZ = pytz.timezone("Asia/Ho_Chi_Minh")
+
+# Supported bucket sizes in seconds
+BUCKET_SIZES = {
+    "minute": 60,
+    "hour": 3600,
+}
+
+
+def parse_time(value):
+    """Parse an ISO 8601 time into epoch seconds (naive times are taken as VN time)"""
+    dt = datetime.fromisoformat(value)
+    if dt.tzinfo is None:
+        dt = VN_TZ.localize(dt)
+    return int(dt.timestamp())
+
+
+def normalize_gender(value):
+    """Normalize gender values read from Excel ("1", 1, 1.0) to "1" / "0" """
+    if value is None or value == "":
+        return ""
+    try:
+        return str(int(float(value)))
+    except (ValueError, TypeError):
+        return str(value).strip()
+
+
+class VoteTimeline:
+    """
+    Time-bucketed vote counts kept up to date on every vote.
+
+    Counts are stored per bucket size as {scope: {bucket_start: votes}} where
+    scope is "all", ("candidate", id) or ("gender", g). Queries walk the
+    requested bucket range only, so they cost O(buckets) rather than O(votes).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = {name: {} for name in BUCKET_SIZES}
+
+    def add(self, candidate_id, gender, time, vote_count):
+        """Record a vote of `vote_count` for `candidate_id` at ISO `time`"""
+        ts = parse_time(time)
+        scopes = ["all", ("candidate", str(candidate_id))]
+        gender = normalize_gender(gender)
+        if gender:
+            scopes.append(("gender", gender))
+
+        with self._lock:
+            for name, size in BUCKET_SIZES.items():
+                start = ts - ts % size
+                series = self._series[name]
+                for scope in scopes:
+                    buckets = series.setdefault(scope, {})
+                    buckets[start] = buckets.get(start, 0) + vote_count
+
+    def rebuild(self, records, genders):
+        """
+        Rebuild all buckets from journal records.
+        `genders` maps candidate ID -> gender.
+        """
+        with self._lock:
+            self._series = {name: {} for name in BUCKET_SIZES}
+
+        for record in records:
+            self.add(
+                record["candidateId"],
+                genders.get(str(record["candidateId"])),
+                record["time"],
+                record.get("votecount", 0)
+            )
+
+    def export_state(self):
+        """Return a picklable copy of all buckets (for snapshots)"""
+        with self._lock:
+            return {
+                name: {scope: dict(buckets) for scope, buckets in series.items()}
+                for name, series in self._series.items()
+            }
+
+    def load_state(self, state):
+        """Replace all buckets with a state from export_state()"""
+        with self._lock:
+            self._series = {name: state.get(name, {}) for name in BUCKET_SIZES}
+
+    def query(self, bucket="hour", start=None, end=None, candidate_id=None, gender=None):
+        """
+        Return [(bucket_start, votes), ...] for every bucket in [start, end].
+        `start` / `end` are epoch seconds; when omitted the range is taken from
+        the first / last recorded bucket. Empty buckets are returned as 0.
+        """
+        size = BUCKET_SIZES[bucket]
+        if candidate_id:
+            scope = ("candidate", str(candidate_id))
+        elif gender not in (None, ""):
+            scope = ("gender", normalize_gender(gender))
+        else:
+            scope = "all"
+
+        with self._lock:
+            buckets = self._series[bucket].get(scope)
+            if not buckets:
+                return []
+
+            # Clamp the range to recorded data so open or very wide ranges stay cheap
+            first, last = min(buckets), max(buckets)
+            start = first if start is None else max(start - start % size, first)
+            end = last if end is None else min(end - end % size, last)
+
+            return [(t, buckets.get(t, 0)) for t in range(start, end + 1, size)]
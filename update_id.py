@@ -3,6 +3,7 @@ import json
 from filelock import FileLock
 import os
 from datetime import datetime
+from employee_table import apply_pending_votes
 
 # File paths
 MAPPING_FILE = "employee_mapping.json"
@@ -54,6 +55,10 @@ def update_employee_ids():
     try:
         # Use file lock to prevent concurrent access
         with FileLock(LOCK_FILE, timeout=10):
+            # Save votes the app has not written yet: the vote history keeps the
+            # old IDs, so they cannot be re-applied after the IDs change
+            apply_pending_votes(DATA_FILE)
+
             # Read the Excel file
             print(f"Reading {DATA_FILE}...")
             df = pd.read_excel(DATA_FILE, engine='openpyxl')
@@ -0,0 +1,163 @@
+import base64
+import json
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+
+
+def encode_cursor(key):
+    """Encode a (time, sequence) position as an opaque URL-safe cursor"""
+    raw = json.dumps(list(key), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Decode a cursor from encode_cursor(). Raises ValueError if malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        ts, seq = json.loads(raw)
+        return (float(ts), int(seq))
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+class _Timeline:
+    """Entries kept sorted by (time, sequence) with parallel key / item lists"""
+
+    def __init__(self):
+        self.keys = []
+        self.items = []
+
+    def add(self, key, item):
+        if not self.keys or key > self.keys[-1]:
+            self.keys.append(key)
+            self.items.append(item)
+        else:
+            i = bisect_right(self.keys, key)
+            self.keys.insert(i, key)
+            self.items.insert(i, item)
+
+    def page_ascending(self, cursor, limit):
+        start = bisect_right(self.keys, cursor) if cursor else 0
+        end = len(self.keys) if limit is None else min(start + limit, len(self.keys))
+        next_key = self.keys[end - 1] if end < len(self.keys) and end > start else None
+        return self.items[start:end], next_key
+
+    def page_descending(self, cursor, limit):
+        end = bisect_left(self.keys, cursor) if cursor else len(self.keys)
+        start = 0 if limit is None else max(end - limit, 0)
+        next_key = self.keys[start] if start > 0 else None
+        return self.items[start:end][::-1], next_key
+
+
+class VoteIndex:
+    """
+    In-memory index of vote records by voter and by candidate.
+
+    Every record carries its vote journal sequence number, so
+    (time, sequence) gives a stable total order for cursor pagination even
+    when several votes share the same timestamp.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._seq = 0
+        self._by_voter = {}
+        self._by_candidate = {}
+        self._received_totals = {}
+
+    @property
+    def last_seq(self):
+        """Sequence number of the most recently indexed record"""
+        with self._lock:
+            return self._seq
+
+    def add(self, voter_id, candidate_id, time, vote_count, seq=None):
+        """Index one vote record. `seq` defaults to the next sequence number."""
+        ts = datetime.fromisoformat(time).timestamp()
+        voter_id = str(voter_id)
+        candidate_id = str(candidate_id)
+
+        with self._lock:
+            if seq is None:
+                seq = self._seq + 1
+            self._seq = max(self._seq, seq)
+            key = (ts, seq)
+            self._by_voter.setdefault(voter_id, _Timeline()).add(key, {
+                "candidateId": candidate_id,
+                "time": time,
+                "votecount": vote_count
+            })
+            self._by_candidate.setdefault(candidate_id, _Timeline()).add(key, {
+                "voterId": voter_id,
+                "time": time,
+                "votecount": vote_count
+            })
+            self._received_totals[candidate_id] = self._received_totals.get(candidate_id, 0) + vote_count
+
+    def rebuild(self, records):
+        """Rebuild the index from journal records, in journal order"""
+        with self._lock:
+            self._reset()
+
+        for record in records:
+            self.add(record["voterId"], record["candidateId"], record["time"],
+                     record.get("votecount", 0), record.get("seq"))
+
+    def export_state(self):
+        """Return a picklable copy of the index (for snapshots)"""
+        with self._lock:
+            return {
+                "seq": self._seq,
+                "by_voter": {k: (list(v.keys), list(v.items)) for k, v in self._by_voter.items()},
+                "by_candidate": {k: (list(v.keys), list(v.items)) for k, v in self._by_candidate.items()},
+                "received_totals": dict(self._received_totals)
+            }
+
+    def load_state(self, state):
+        """Replace the index with a state from export_state()"""
+        with self._lock:
+            self._reset()
+            self._seq = state["seq"]
+            for target, source in ((self._by_voter, state["by_voter"]),
+                                   (self._by_candidate, state["by_candidate"])):
+                for k, (keys, items) in source.items():
+                    entries = target[k] = _Timeline()
+                    entries.keys = keys
+                    entries.items = items
+            self._received_totals = state["received_totals"]
+
+    def votes_cast(self, voter_id, cursor=None, limit=None):
+        """
+        Page through votes cast by `voter_id`, oldest first.
+        Returns (records, next_cursor); next_cursor is None on the last page.
+        """
+        key = decode_cursor(cursor) if cursor else None
+        with self._lock:
+            entries = self._by_voter.get(str(voter_id))
+            if entries is None:
+                return [], None
+            items, next_key = entries.page_ascending(key, limit)
+        return items, encode_cursor(next_key) if next_key else None
+
+    def votes_received(self, candidate_id, cursor=None, limit=None):
+        """
+        Page through votes received by `candidate_id`, most recent first.
+        Returns (records, next_cursor); next_cursor is None on the last page.
+        """
+        key = decode_cursor(cursor) if cursor else None
+        with self._lock:
+            entries = self._by_candidate.get(str(candidate_id))
+            if entries is None:
+                return [], None
+            items, next_key = entries.page_descending(key, limit)
+        return items, encode_cursor(next_key) if next_key else None
+
+    def received_summary(self, candidate_id):
+        """Return (total votes received, number of vote records) for a candidate"""
+        with self._lock:
+            entries = self._by_candidate.get(str(candidate_id))
+            return self._received_totals.get(str(candidate_id), 0), len(entries.keys) if entries else 0
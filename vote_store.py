@@ -0,0 +1,433 @@
+import json
+import os
+from datetime import datetime
+import pytz
+from filelock import FileLock
+
+# Vote history is stored as append-only JSONL segments, one per VN day (or
+# more if a day outgrows MAX_SEGMENT_BYTES), plus a manifest describing the
+# closed ones. Only the newest segment is ever appended to; once a segment is
+# closed it is never modified again and can be read without taking a lock.
+HISTORY_DIR = "vote_history"
+MANIFEST_FILE = os.path.join(HISTORY_DIR, "manifest.json")
+HISTORY_LOCK_FILE = "locks/vote_history.lock"
+MAX_SEGMENT_BYTES = int(os.getenv("MAX_SEGMENT_BYTES", str(8 * 1024 * 1024)))
+# Bytes read per step when reading the open segment backwards from its end
+TAIL_CHUNK_BYTES = 64 * 1024
+VN_TZ = pytz.timezone("Asia/Ho_Chi_Minh")
+
+# Pre-segment history file, migrated on first start
+LEGACY_HISTORY_FILE = "vote_history.json"
+
+
+def _parse_ts(time):
+    return datetime.fromisoformat(time).timestamp()
+
+
+def _segment_day(time):
+    """VN calendar day of an ISO vote time, e.g. "2026-01-26" """
+    return datetime.fromisoformat(time).astimezone(VN_TZ).strftime("%Y-%m-%d")
+
+
+def _segment_name(day, part):
+    return f"{day}.{part:03d}.jsonl"
+
+
+def _segment_path(name):
+    return os.path.join(HISTORY_DIR, name)
+
+
+def _dumps(record):
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+# ======================
+# Manifest
+# ======================
+def read_manifest():
+    """Read the manifest of closed segments. Replaced atomically, so no lock is needed."""
+    try:
+        with open(MANIFEST_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"segments": []}
+
+
+def _write_manifest(manifest):
+    tmp_file = MANIFEST_FILE + ".tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, MANIFEST_FILE)
+
+
+def _segment_stats(name, records):
+    """Manifest entry for a segment: time / seq bounds and per-candidate totals"""
+    totals = {}
+    for record in records:
+        candidate_id = record["candidateId"]
+        totals[candidate_id] = totals.get(candidate_id, 0) + record.get("votecount", 0)
+
+    by_time = sorted(records, key=lambda r: _parse_ts(r["time"]))
+    return {
+        "name": name,
+        "records": len(records),
+        "minTime": by_time[0]["time"] if by_time else None,
+        "maxTime": by_time[-1]["time"] if by_time else None,
+        "minSeq": min((r["seq"] for r in records), default=0),
+        "maxSeq": max((r["seq"] for r in records), default=0),
+        "totals": totals
+    }
+
+
+def _segment_names():
+    try:
+        return sorted(n for n in os.listdir(HISTORY_DIR) if n.endswith(".jsonl"))
+    except FileNotFoundError:
+        return []
+
+
+def _active_segment(manifest):
+    """Name of the open segment (the newest one not in the manifest), or None"""
+    closed = {s["name"] for s in manifest["segments"]}
+    names = [n for n in _segment_names() if n not in closed]
+    return names[-1] if names else None
+
+
+def _close_segment(manifest, name):
+    manifest["segments"].append(_segment_stats(name, read_segment(name)))
+    manifest["segments"].sort(key=lambda s: s["name"])
+    _write_manifest(manifest)
+
+
+def recover_segments():
+    """
+    Close any segment left open by an interrupted roll-over, so that at most
+    the newest segment is open. Safe to call on every start.
+    """
+    with FileLock(HISTORY_LOCK_FILE):
+        manifest = read_manifest()
+        closed = {s["name"] for s in manifest["segments"]}
+        open_names = [n for n in _segment_names() if n not in closed]
+        for name in open_names[:-1]:
+            _close_segment(manifest, name)
+
+
+# ======================
+# Segments
+# ======================
+def read_segment(name):
+    """
+    Read all records of a segment. A trailing partial line (interrupted write)
+    is ignored.
+    """
+    records = []
+    try:
+        with open(_segment_path(name), "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    except FileNotFoundError:
+        pass
+    return records
+
+
+def _records_backwards(name):
+    """
+    Yield the records of a segment from the last one to the first, reading
+    the file in TAIL_CHUNK_BYTES steps from its end. A trailing partial line
+    (interrupted write) is ignored.
+    """
+    try:
+        f = open(_segment_path(name), "rb")
+    except FileNotFoundError:
+        return
+
+    with f:
+        pos = f.seek(0, os.SEEK_END)
+        carry = b""
+        partial_tail = True
+        while pos > 0:
+            size = min(TAIL_CHUNK_BYTES, pos)
+            pos -= size
+            f.seek(pos)
+            lines = (f.read(size) + carry).split(b"\n")
+            # The first piece may continue in the previous chunk
+            carry = lines.pop(0)
+            if partial_tail and lines:
+                # Text after the last newline: empty or an interrupted write
+                lines.pop()
+                partial_tail = False
+            for line in reversed(lines):
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+        if carry and not partial_tail:
+            try:
+                yield json.loads(carry)
+            except json.JSONDecodeError:
+                pass
+
+
+def _read_segment_after(name, since_seq):
+    """
+    Records of a segment with seq > since_seq. Records are appended in seq
+    order, so only the tail after since_seq is read.
+    """
+    records = []
+    for record in _records_backwards(name):
+        if record["seq"] <= since_seq:
+            break
+        records.append(record)
+    records.reverse()
+    return records
+
+
+def _last_seq(manifest):
+    """Highest stored seq. Caller holds the history lock."""
+    closed_max = max((s["maxSeq"] for s in manifest["segments"]), default=0)
+    name = _active_segment(manifest)
+    last = next(_records_backwards(name), None) if name else None
+    return max(closed_max, last["seq"] if last else 0)
+
+
+def _drop_partial_tail(name):
+    """
+    Cut a trailing partial line left by an interrupted write, so the next
+    record starts on its own line. Caller holds the history lock.
+    """
+    try:
+        f = open(_segment_path(name), "r+b")
+    except FileNotFoundError:
+        return
+
+    with f:
+        end = f.seek(0, os.SEEK_END)
+        if end == 0:
+            return
+        f.seek(end - 1)
+        if f.read(1) == b"\n":
+            return
+
+        keep = 0
+        pos = end
+        while pos > 0:
+            size = min(TAIL_CHUNK_BYTES, pos)
+            pos -= size
+            f.seek(pos)
+            newline = f.read(size).rfind(b"\n")
+            if newline >= 0:
+                keep = pos + newline + 1
+                break
+        f.truncate(keep)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _read_view(since_seq=None):
+    """
+    Read the manifest and the open segment together under the history lock.
+    With `since_seq` only the open segment's records newer than it are read.
+    Returns (manifest, open segment name, open segment records). The closed
+    segments listed in the manifest can then be read without the lock.
+    """
+    with FileLock(HISTORY_LOCK_FILE):
+        manifest = read_manifest()
+        name = _active_segment(manifest)
+        if name is None:
+            return manifest, None, []
+        if since_seq is None:
+            return manifest, name, read_segment(name)
+        return manifest, name, _read_segment_after(name, since_seq)
+
+
+def append_vote(record):
+    """
+    Append one vote record ("voterId", "candidateId", "time", "votecount")
+    to the open segment, rolling over to a new segment when the VN day
+    changes or the open one reaches MAX_SEGMENT_BYTES.
+    The record's "seq" is allocated here, under the history lock, from the
+    last seq stored on disk, so it is unique across processes.
+    Returns the seq.
+    """
+    day = _segment_day(record["time"])
+
+    with FileLock(HISTORY_LOCK_FILE):
+        os.makedirs(HISTORY_DIR, exist_ok=True)
+        manifest = read_manifest()
+        record["seq"] = _last_seq(manifest) + 1
+        line = _dumps(record)
+        name = _active_segment(manifest)
+
+        if name is None:
+            name = _segment_name(day, 0)
+        else:
+            active_day, part = name.split(".")[:2]
+            if active_day < day:
+                _close_segment(manifest, name)
+                name = _segment_name(day, 0)
+            elif os.path.getsize(_segment_path(name)) >= MAX_SEGMENT_BYTES:
+                _close_segment(manifest, name)
+                name = _segment_name(active_day, int(part) + 1)
+
+        _drop_partial_tail(name)
+        with open(_segment_path(name), "a", encoding="utf-8") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+    return record["seq"]
+
+
+def read_votes(since_seq=0):
+    """
+    Return all records with seq > since_seq in seq order. Closed segments
+    whose maxSeq is <= since_seq are skipped without being opened.
+    """
+    manifest, _, active = _read_view(since_seq)
+    records = []
+    for segment in manifest["segments"]:
+        if segment["maxSeq"] > since_seq:
+            records.extend(r for r in read_segment(segment["name"]) if r["seq"] > since_seq)
+
+    records.extend(r for r in active if r["seq"] > since_seq)
+    records.sort(key=lambda r: r["seq"])
+    return records
+
+
+def last_seq():
+    """Highest sequence number stored, 0 if there is no history"""
+    with FileLock(HISTORY_LOCK_FILE):
+        return _last_seq(read_manifest())
+
+
+# ======================
+# Range queries
+# ======================
+def _overlap(segment, start, end):
+    """"none", "full" or "partial" overlap of a closed segment with [start, end]"""
+    if not segment["records"]:
+        return "none"
+    seg_start, seg_end = _parse_ts(segment["minTime"]), _parse_ts(segment["maxTime"])
+    if (start is not None and seg_end < start) or (end is not None and seg_start > end):
+        return "none"
+    if (start is None or seg_start >= start) and (end is None or seg_end <= end):
+        return "full"
+    return "partial"
+
+
+def _in_range(record, start, end):
+    ts = _parse_ts(record["time"])
+    return (start is None or ts >= start) and (end is None or ts <= end)
+
+
+def range_totals(start=None, end=None):
+    """
+    Total votes per candidate for votes in [start, end].
+    Closed segments fully inside the range contribute their stored totals,
+    segments outside it are skipped, and only partially covered segments and
+    the open segment are scanned.
+    Returns (totals, stats) where stats counts records and segments per kind.
+    """
+    manifest, name, active = _read_view()
+    totals = {}
+    stats = {"records": 0, "segmentsReused": 0, "segmentsScanned": 0, "segmentsSkipped": 0}
+
+    def add(candidate_id, votes):
+        totals[candidate_id] = totals.get(candidate_id, 0) + votes
+
+    def scan(records):
+        stats["segmentsScanned"] += 1
+        for record in records:
+            if _in_range(record, start, end):
+                add(record["candidateId"], record.get("votecount", 0))
+                stats["records"] += 1
+
+    for segment in manifest["segments"]:
+        overlap = _overlap(segment, start, end)
+        if overlap == "none":
+            stats["segmentsSkipped"] += 1
+        elif overlap == "full":
+            stats["segmentsReused"] += 1
+            stats["records"] += segment["records"]
+            for candidate_id, votes in segment["totals"].items():
+                add(candidate_id, votes)
+        else:
+            scan(read_segment(segment["name"]))
+
+    if name:
+        scan(active)
+
+    return totals, stats
+
+
+# ======================
+# Migration
+# ======================
+def _legacy_records():
+    """Records from vote_history.json, numbered in time order"""
+    try:
+        with open(LEGACY_HISTORY_FILE, "r", encoding="utf-8") as f:
+            history = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return []
+
+    votes = [
+        (_parse_ts(vote["time"]), voter_id, vote)
+        for voter_id, vote_records in history.items()
+        for vote in vote_records
+        if vote.get("candidateId") and vote.get("time")
+    ]
+    votes.sort(key=lambda v: (v[0], v[1]))
+    return [
+        {
+            "seq": seq,
+            "voterId": voter_id,
+            "candidateId": vote["candidateId"],
+            "time": vote["time"],
+            "votecount": vote.get("votecount", 0)
+        }
+        for seq, (_, voter_id, vote) in enumerate(votes, start=1)
+    ]
+
+
+def migrate_legacy_history():
+    """
+    Split vote_history.json into per-day segments. Does nothing once any
+    segment exists; the file is left in place untouched.
+    Returns the number of migrated records.
+    """
+    with FileLock(HISTORY_LOCK_FILE):
+        if _segment_names():
+            return 0
+
+        records = _legacy_records()
+        if not records:
+            return 0
+
+        by_day = {}
+        for record in records:
+            by_day.setdefault(_segment_day(record["time"]), []).append(record)
+
+        os.makedirs(HISTORY_DIR, exist_ok=True)
+        manifest = {"segments": []}
+        days = sorted(by_day)
+        for day in days:
+            name = _segment_name(day, 0)
+            day_records = sorted(by_day[day], key=lambda r: r["seq"])
+            with open(_segment_path(name), "w", encoding="utf-8") as f:
+                f.writelines(_dumps(r) for r in day_records)
+                f.flush()
+                os.fsync(f.fileno())
+            # The newest day stays open for appends
+            if day != days[-1]:
+                manifest["segments"].append(_segment_stats(name, day_records))
+        _write_manifest(manifest)
+
+        return len(records)